@@ -1,30 +1,73 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
+import json_codec
 import os  # Added missing import
+import re
+from concurrent.futures import ThreadPoolExecutor
+import transport
+from fetch_engine import rate_limiter
+from http_cache import response_cache
+from parsing import make_soup
+from robots_cache import configure_host
 
 # Set up output path
 # Save in current directory
 OUTPUT_FILE = os.path.join(os.getcwd(), 'cookpad_recipes.jsonl')
 
+# Concurrent fetching; the per-host rate limiter keeps requests at least
+# the robots.txt Crawl-delay (or robots_cache.DEFAULT_DELAY seconds) apart
+WORKERS = 4
+HOST = 'cookpad.com'
+configure_host(f'https://{HOST}')
+
+# Class substrings marking the ingredient list and the comment blocks
+INGREDIENT_CLASS = re.compile('ingredient')
+COMMENT_CLASS = re.compile('comment|feedback')
+
+
+def region_items(soup, class_pattern):
+    """
+    One text per entry of the regions whose class contains `class_pattern`
+    (a compiled regex), in page order.
+
+    Matches nested in another match belong to the outermost one. A region's
+    entries are its top-level <li> lines, else the matches directly inside
+    it, else the region itself; repeated texts are kept once.
+    """
+    matched = soup.find_all(class_=class_pattern)
+    matched_ids = {id(el) for el in matched}
+    regions, inner = [], {}
+    for el in matched:
+        owner = next((p for p in el.parents if id(p) in matched_ids), None)
+        if owner is None:
+            regions.append(el)
+        else:
+            inner.setdefault(id(owner), []).append(el)
+
+    items, seen = [], set()
+    for region in regions:
+        lines = region.find_all('li')
+        line_ids = {id(li) for li in lines}
+        entries = ([li for li in lines if not any(id(p) in line_ids for p in li.parents)]
+                   or inner.get(id(region)) or [region])
+        for entry in entries:
+            text = entry.get_text(' ', strip=True)
+            if text and text not in seen:
+                seen.add(text)
+                items.append(text)
+    return items
 
 def scrape_cookpad_recipe(url):
     headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        response = requests.get(url, headers=headers)
+        rate_limiter.wait(HOST)
+        response = response_cache.get(url, headers=headers)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
 
         # Extract data
         title = soup.find('h1').text.strip() if soup.find('h1') else "No title"
 
-        ingredients = []
-        for ing in soup.select('[class*=ingredient]'):
-            text = ing.get_text(strip=True)
-            if text and text not in ingredients:
-                ingredients.append(text)
+        ingredients = region_items(soup, INGREDIENT_CLASS)
 
         steps = []
         step_elements = soup.find_all('div', class_='step__text') or soup.find_all('li', class_='step')
@@ -33,12 +76,7 @@ def scrape_cookpad_recipe(url):
 
 
         # Extract comments or reviews
-        comments = []
-        comment_blocks = soup.select('[class*=comment], [class*=feedback]')
-        for comment in comment_blocks:
-            text = comment.get_text(strip=True)
-            if text and text not in comments:
-                comments.append(text)
+        comments = region_items(soup, COMMENT_CLASS)
 
         return {
             "title": title,
@@ -1303,21 +1341,25 @@ urls = [
 "https://cookpad.com/ng/recipes/16498649-amaranthus-noodles",
 ]
 
-# Scrape all recipes with delay
-all_recipes = []
-for url in urls:
+def scrape_logged(url):
     print(f"Scraping: {url}")
-    recipe = scrape_cookpad_recipe(url)
-    if recipe:
-        all_recipes.append(recipe)
-    time.sleep(2)
+    return scrape_cookpad_recipe(url)
+
+# Scrape all recipes on a bounded worker pool; map() keeps the URL order
+all_recipes = []
+with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+    for recipe in pool.map(scrape_logged, urls):
+        if recipe:
+            all_recipes.append(recipe)
 
 print(f"📁 Will save recipes to: {os.path.abspath(OUTPUT_FILE)}")
 
 # Save to JSONL (one JSON object per line)
 with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
     for recipe in all_recipes:
-        json_line = json.dumps(recipe, ensure_ascii=False)
+        json_line = json_codec.dumps(recipe)
         f.write(json_line + '\n')
 
 print(f"✅ Saved {len(all_recipes)} recipes to {OUTPUT_FILE}")
+print(f"HTTP cache: {response_cache.summary()}")
+print(f"Transport: {transport.stats.summary()}")
@@ -1,20 +1,13 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
-import json
 import pandas as pd
-import time
+from browser_pool import DriverPool, HybridFetcher, jsonld_texts, load_page, render_stats
+from robots_cache import configure_host
+from scraper_core import first_jsonld_recipe
 
-# Set up Selenium with headless Chrome
-options = Options()
-options.add_argument('--headless')
-options.add_argument('--no-sandbox')
-options.add_argument('--disable-dev-shm-usage')
-
-# Start the browser
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# Headless Chrome pool; page loads per host stay at least the robots.txt
+# Crawl-delay (or robots_cache.DEFAULT_DELAY seconds) apart
+POOL_SIZE = 4
+FETCH_MODE = 'hybrid'  # 'hybrid': plain HTTP first, Chrome only without JSON-LD; 'browser': always Chrome
+configure_host('https://www.food.com')
 
 # Corrected: wrap URLs in a list
 urls = [
@@ -451,30 +444,33 @@ urls = [
 
 ]
 
-# Extract structured data from each URL
-data = []
+def extract_page(driver, url):
+    load_page(driver, url)  # Returns once the JSON-LD Recipe has rendered
 
-for url in urls:
-    try:
-        driver.get(url)
-        time.sleep(2)  # Allow time for page to load
+    # Extract JSON-LD data in the browser; only the script texts cross the wire.
+    # Same Recipe node the static path returns, also on @graph pages
+    return first_jsonld_recipe(jsonld_texts(driver)) or None
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+# Extract structured data from each URL
+data = []
 
-        # Extract JSON-LD data
-        script_tag = soup.find("script", type="application/ld+json")
-        if script_tag:
-            json_data = json.loads(script_tag.string)
-            if isinstance(json_data, list):  # Sometimes it's a list
-                json_data = json_data[0]
-            data.append(json_data)
-        else:
+with DriverPool(POOL_SIZE) as pool:  # closes every browser on exit
+    if FETCH_MODE == 'hybrid':
+        fetcher = HybridFetcher(pool, extract_page)
+        results = fetcher.map(urls)
+    else:
+        results = pool.map(extract_page, urls)
+    for url, json_data, error in results:
+        if error is not None:
+            print(f"Error processing {url}: {error}")
+        elif json_data is None:
             print(f"No JSON-LD found for {url}")
-    except Exception as e:
-        print(f"Error processing {url}: {e}")
+        else:
+            data.append(json_data)
 
-# Close the browser
-driver.quit()
+if FETCH_MODE == 'hybrid':
+    print(f"Fetch split: {fetcher.summary()}")
+print(f"Render waits: {render_stats.summary()}")
 
 
 # Convert to DataFrame and save as JSON
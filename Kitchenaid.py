@@ -1,6 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import json_codec
+from functools import partial
+import transport
+from http_cache import response_cache
+from parsing import heading_sections, make_soup
+from streaming import fetch_partial
 
 # List of KitchenAid recipe URLs
 urls = [
@@ -43,6 +46,9 @@ urls = [
     "https://www.kitchenaid.com/pinch-of-help/stand-mixers/vegetable-sheet-cutter-recipes-and-uses.html",
 ]
 
+# Stop downloading once the JSON-LD block and the end of the article body are in
+STOP_MARKERS = (b"</article>",)
+
 # Set headers to mimic a real browser
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
@@ -55,15 +61,16 @@ all_recipes = []
 for url in urls:
     recipe_data = {"source": url}
     try:
-        response = requests.get(url, headers=headers)
+        response = response_cache.get(url, headers=headers, fetch=partial(fetch_partial, markers=STOP_MARKERS),
+                                      allow_truncated=True)
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = make_soup(response.content)
 
             # Extract JSON-LD if present
             script_tag = soup.find("script", type="application/ld+json")
             if script_tag:
                 try:
-                    json_data = json.loads(script_tag.string)
+                    json_data = json_codec.loads(script_tag.string)
                     if isinstance(json_data, list):
                         json_data = json_data[0]
                     recipe_data.update(json_data)
@@ -75,24 +82,9 @@ for url in urls:
                 title = soup.find("h1")
                 recipe_data["title"] = title.get_text(strip=True) if title else "No title found"
 
-            # Extract ingredients
-            ingredients = []
-            ingredients_heading = soup.find(lambda tag: tag.name == "h2" and "ingredients" in tag.get_text(strip=True).lower())
-            if ingredients_heading:
-                ingredients_list = ingredients_heading.find_next_sibling()
-                if ingredients_list and ingredients_list.name in ["ul", "ol"]:
-                    ingredients = [li.get_text(strip=True) for li in ingredients_list.find_all("li")]
+            # Ingredients and preparation steps, in one pass over the headings
+            ingredients, steps = heading_sections(soup)
             recipe_data["ingredients"] = ingredients if ingredients else "No ingredients found"
-
-            # Extract preparation steps
-            steps = []
-            step_headings = soup.find_all(lambda tag: tag.name == "h3" and "step" in tag.get_text(strip=True).lower())
-            for heading in step_headings:
-                step_text = heading.get_text(strip=True)
-                next_paragraph = heading.find_next_sibling()
-                if next_paragraph and next_paragraph.name == "p":
-                    step_text += " " + next_paragraph.get_text(strip=True)
-                steps.append(step_text)
             recipe_data["steps"] = steps if steps else "No preparation steps found"
 
             all_recipes.append(recipe_data)
@@ -103,6 +95,8 @@ for url in urls:
 
 # Save all recipe data to a JSON file
 with open("kitchenaid_recipes.json", "w", encoding="utf-8") as f:
-    json.dump(all_recipes, f, ensure_ascii=False, indent=4)
+    f.write(json_codec.dumps(all_recipes, indent=4))
 
 print("All recipe data saved to 'kitchenaid_recipes.json'")
+print(f"HTTP cache: {response_cache.summary()}")
+print(f"Transport: {transport.stats.summary()}")
@@ -0,0 +1,269 @@
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+import json_codec
+from http_cache import CACHE_DIR
+from parsing import available_backends, heading_sections, make_soup, region_strainer
+from scraper_core import extract_jsonld_recipe, iter_jsonld_recipes, scan_jsonld_recipe
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+FIXTURES_DIR = 'fixtures'  # saved *.html pages (`python make_fixtures.py`); falls back to the response cache
+ROUNDS = 3
+JSONLD_DATASET = 'foodcom_recipes.json'  # Recipe objects for the JSON-LD search benchmark
+# Committed scraper output for the JSON codec benchmark
+DATASETS = ('recipes_dataset.jsonl', 'Epicurious_dataset.jsonl', 'cookpad_recipes.jsonl',
+            'foodcom_recipes.json', 'kitchenaid_recipes.json')
+# Values the fast JSON encoders write differently from the stdlib, checked on
+# top of the dataset records
+JSON_EDGE_CASES = [
+    {'rating': 4.5, 'small': 1e-7, 'tiny': 1.5e-05, 'big': 1e16, 'huge': 1e300, 'neg_zero': -0.0},
+    {'nan': float('nan'), 'inf': float('inf'), 'ninf': float('-inf')},
+    {'big_int': 2 ** 70, 'keys': {1: 'int', 1e-7: 'float', None: 'none'}, 'bool_keys': {True: 'bool'}},
+    {'text': 'Crème brûlée, "quoted": \\ \x1f \x7f \u2028 \U0001F600', 'empty': [{}, []]},
+    ['a', ('tuple', 1), [[]], None, True, False],
+]
+# comment_regions of AllRecipes and Epicurious (the runner scripts are not importable)
+COMMENT_REGIONS = (('div', 'class', 'feedback-list'), ('div', 'class', 'reviews__review'))
+
+# ---------------------------
+# Helpers
+# ---------------------------
+
+def _is_truncated(body_path):
+    # fetch_partial bodies stop at the recipe markup and would skew every benchmark
+    try:
+        with open(body_path[:-len('.body')] + '.json', encoding='utf-8') as f:
+            return bool(json.load(f).get('truncated'))
+    except (OSError, ValueError):
+        return True
+
+def load_fixtures(directory=None):
+    """Raw bytes of every saved page under `directory`, skipping truncated cache bodies."""
+    directory = directory or (FIXTURES_DIR if os.path.isdir(FIXTURES_DIR) else CACHE_DIR)
+    bodies = glob.glob(os.path.join(directory, '**', '*.body'), recursive=True)
+    paths = sorted(glob.glob(os.path.join(directory, '**', '*.html'), recursive=True)
+                   + [path for path in bodies if not _is_truncated(path)])
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    if not pages:
+        raise SystemExit(f"No saved pages (*.html or complete *.body) under {directory!r}; "
+                         f"run `python make_fixtures.py` to generate {FIXTURES_DIR}/")
+    return pages
+
+def load_jsonld_documents(path=None):
+    """
+    JSON-LD documents built from the Recipe objects in `path`: each object
+    once as a bare Recipe, and once at the end of an @graph behind the
+    WebPage/Organization nodes and a page of reviews, the way recipe sites
+    nest it.
+    """
+    with open(path or JSONLD_DATASET, encoding='utf-8') as f:
+        recipes = [r for r in json.load(f) if isinstance(r, dict)]
+    documents = []
+    for recipe in recipes:
+        reviews = [{'@type': 'Review', 'author': {'@type': 'Person', 'name': f'cook {i}'},
+                    'reviewBody': 'Made this twice, great both times.',
+                    'reviewRating': {'@type': 'Rating', 'ratingValue': 5}} for i in range(100)]
+        documents.append(dict(recipe, review=reviews))
+        documents.append({'@context': 'https://schema.org', '@graph': [
+            {'@type': 'WebPage', '@id': recipe.get('url', '#webpage'),
+             'breadcrumb': {'@type': 'BreadcrumbList', 'itemListElement': []}},
+            {'@type': 'Organization', 'name': 'Food.com'},
+            dict(recipe, review=reviews),
+        ]})
+    return documents
+
+def load_dataset_records(paths=None):
+    """Every record of the *.jsonl / *.json datasets in `paths` (comma-separated)."""
+    records = []
+    for path in paths.split(',') if paths else DATASETS:
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                records.extend(json.loads(line) for line in f if line.strip())
+            else:
+                records.extend(json.load(f))
+    return records
+
+def _find_recipes_recursive(data):
+    """The previous recursive search, kept as the benchmark baseline."""
+    found = []
+    if isinstance(data, dict):
+        types = data.get('@type', [])
+        if (isinstance(types, list) and 'Recipe' in types) or types == 'Recipe':
+            found.append(data)
+        for v in data.values():
+            found += _find_recipes_recursive(v)
+    elif isinstance(data, list):
+        for item in data:
+            found += _find_recipes_recursive(item)
+    return found
+
+def _lambda_sections(soup):
+    """Kitchenaid.py's previous find(lambda)/find_all(lambda) scans, kept as the baseline."""
+    ingredients = []
+    heading = soup.find(lambda tag: tag.name == "h2" and "ingredients" in tag.get_text(strip=True).lower())
+    if heading:
+        following = heading.find_next_sibling()
+        if following and following.name in ["ul", "ol"]:
+            ingredients = [li.get_text(strip=True) for li in following.find_all("li")]
+    steps = []
+    for heading in soup.find_all(lambda tag: tag.name == "h3" and "step" in tag.get_text(strip=True).lower()):
+        text = heading.get_text(strip=True)
+        following = heading.find_next_sibling()
+        if following and following.name == "p":
+            text += " " + following.get_text(strip=True)
+        steps.append(text)
+    return ingredients, steps
+
+def peak_bytes(func, item):
+    tracemalloc.start()
+    try:
+        func(item)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def items_per_sec(func, items, rounds=ROUNDS):
+    """Best-of-`rounds` throughput of func over `items`."""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best if best else float('inf')
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+
+def bench_parsers(pages):
+    """Pages/sec of parse + JSON-LD extraction for each installed backend."""
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB")
+    for backend in available_backends():
+        rate = items_per_sec(lambda page: extract_jsonld_recipe(make_soup(page, backend)), pages)
+        print(f"  {backend:12s} {rate:8.1f} pages/s")
+
+def bench_jsonld(pages):
+    """Check the byte scanner against html.parser on every page, then time both."""
+    mismatches = [i for i, page in enumerate(pages)
+                  if scan_jsonld_recipe(page) != extract_jsonld_recipe(make_soup(page, 'html.parser'))]
+    print(f"{len(pages)} pages, {len(pages) - len(mismatches)} identical to html.parser")
+    for i in mismatches:
+        print(f"  MISMATCH on fixture #{i}")
+    dom = items_per_sec(lambda page: extract_jsonld_recipe(make_soup(page, 'html.parser')), pages)
+    scan = items_per_sec(scan_jsonld_recipe, pages)
+    print(f"  html.parser  {dom:8.1f} pages/s")
+    print(f"  byte scanner {scan:8.1f} pages/s ({scan / dom:.0f}x)")
+    if mismatches:
+        raise SystemExit(1)
+
+def bench_strainer(pages):
+    """Full-page soup vs. a soup of only the comment regions and ld+json scripts."""
+    strainer = region_strainer(COMMENT_REGIONS)
+    backend = 'lxml' if 'lxml' in available_backends() else 'html.parser'
+    full = lambda page: make_soup(page, backend)
+    partial = lambda page: make_soup(page, backend, parse_only=strainer)
+    full_rate, partial_rate = items_per_sec(full, pages), items_per_sec(partial, pages)
+    full_mem = sum(peak_bytes(full, page) for page in pages) / len(pages)
+    partial_mem = sum(peak_bytes(partial, page) for page in pages) / len(pages)
+    print(f"{len(pages)} pages, {backend}")
+    print(f"  full tree    {1000 / full_rate:7.2f} ms/page  peak {full_mem / 1e6:6.2f} MB")
+    print(f"  regions only {1000 / partial_rate:7.2f} ms/page  peak {partial_mem / 1e6:6.2f} MB")
+    print(f"  saving       {1000 / full_rate - 1000 / partial_rate:7.2f} ms/page  "
+          f"     {(full_mem - partial_mem) / 1e6:6.2f} MB")
+
+def bench_jsonld_search(documents):
+    """First Recipe of each decoded JSON-LD document: recursive vs. early-exit search."""
+    def recursive(doc):
+        recipes = _find_recipes_recursive(doc)
+        return recipes[0] if recipes else None
+
+    def early_exit(doc):
+        return next(iter_jsonld_recipes(doc), None)
+
+    mismatches = [i for i, doc in enumerate(documents) if recursive(doc) is not early_exit(doc)]
+    print(f"{len(documents)} documents, {len(documents) - len(mismatches)} pick the same Recipe")
+    old, new = items_per_sec(recursive, documents), items_per_sec(early_exit, documents)
+    print(f"  recursive  {old:10.0f} docs/s")
+    print(f"  early exit {new:10.0f} docs/s ({new / old:.1f}x)")
+    if mismatches:
+        raise SystemExit(1)
+
+def bench_json(records):
+    """
+    Encode and decode the dataset records with every installed JSON backend;
+    dumps must match the writers' json.dumps(record, ensure_ascii=False).
+    """
+    reference = [json.dumps(r, ensure_ascii=False) for r in records]
+    encoded = [line.encode('utf-8') for line in reference]
+    edge_reference = [json.dumps(r, ensure_ascii=False) for r in JSON_EDGE_CASES]
+    size = sum(map(len, encoded)) / 1e6
+    print(f"{len(records)} records, {size:.1f} MB")
+    failed = False
+    for backend in json_codec.available_backends():
+        dumps = lambda r: json_codec.dumps(r, backend=backend)
+        loads = lambda raw: json_codec.loads(raw, backend=backend)
+        differ = sum(dumps(r) != line for r, line in zip(records + JSON_EDGE_CASES,
+                                                         reference + edge_reference))
+        misread = sum(loads(raw) != r for raw, r in zip(encoded, records))
+        failed |= bool(differ or misread)
+        encode_rate = items_per_sec(dumps, records) * size / len(records)
+        decode_rate = items_per_sec(loads, encoded) * size / len(records)
+        print(f"  {backend:8s} dumps {encode_rate:7.1f} MB/s  loads {decode_rate:7.1f} MB/s"
+              f"  ({differ} outputs differ from json, {misread} decode differently)")
+    if failed:
+        raise SystemExit(1)
+
+def bench_sections(pages):
+    """Kitchenaid ingredients/steps: lambda scans vs. the heading section walker."""
+    soups = [make_soup(page) for page in pages]
+    mismatches = [i for i, soup in enumerate(soups) if heading_sections(soup) != _lambda_sections(soup)]
+    found = sum(bool(ingredients or steps) for ingredients, steps in map(heading_sections, soups))
+    print(f"{len(soups)} pages ({found} with sections), "
+          f"{len(soups) - len(mismatches)} identical to the lambda scans")
+    for i in mismatches:
+        print(f"  MISMATCH on fixture #{i}")
+    scans = items_per_sec(_lambda_sections, soups)
+    walker = items_per_sec(heading_sections, soups)
+    print(f"  lambda scans   {scans:8.1f} pages/s")
+    print(f"  section walker {walker:8.1f} pages/s ({walker / scans:.1f}x)")
+    if mismatches:
+        raise SystemExit(1)
+
+BENCHMARKS = {
+    'parsers': bench_parsers,
+    'jsonld': bench_jsonld,
+    'strainer': bench_strainer,
+    'jsonld-search': bench_jsonld_search,
+    'json': bench_json,
+    'sections': bench_sections,
+}
+# Benchmarks whose input is not a directory of saved pages
+LOADERS = {
+    'jsonld-search': load_jsonld_documents,
+    'json': load_dataset_records,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser and extractor benchmarks on saved pages.")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('fixtures', nargs='?',
+                        help=f"directory of saved pages (default: {FIXTURES_DIR}/ or {CACHE_DIR}/); "
+                             f"for jsonld-search a JSON list of Recipe objects (default: {JSONLD_DATASET}); "
+                             f"for json comma-separated dataset files (default: the committed datasets)")
+    args = parser.parse_args()
+    load = LOADERS.get(args.benchmark, load_fixtures)
+    BENCHMARKS[args.benchmark](load(args.fixtures))
+
+if __name__ == '__main__':
+    main()
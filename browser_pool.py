@@ -0,0 +1,460 @@
+import logging
+import os
+import shutil
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+from selenium import webdriver
+from selenium.common.exceptions import (
+    SessionNotCreatedException, TimeoutException, WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    import psutil  # optional: browser memory for RSS-based recycling
+except ImportError:
+    psutil = None
+try:
+    from webdriver_manager.chrome import ChromeDriverManager  # optional: online driver download
+except ImportError:
+    ChromeDriverManager = None
+
+import json_codec
+from fetch_engine import rate_limiter
+from http_cache import response_cache
+from scraper_core import first_jsonld_recipe, scan_jsonld_recipe
+from streaming import fetch_partial
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+POOL_SIZE = 4
+RENDER_TIMEOUT = 10   # seconds to wait for a JSON-LD Recipe after driver.get
+RENDER_POLL = 0.1
+STATIC_WORKERS = 4    # concurrent plain-HTTP fetches in hybrid mode
+
+# chromedriver location remembered from the last online lookup
+CHROMEDRIVER_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'recipe-scraper', 'chromedriver-path')
+# Restart a browser after this many pages, or once Chrome's memory passes RECYCLE_RSS_MB
+RECYCLE_PAGES = 200
+RECYCLE_RSS_MB = 1024
+RSS_CHECK_EVERY = 10  # pages between memory checks (needs psutil)
+
+# Requests Chrome never makes while rendering (DevTools Network.setBlockedURLs)
+BLOCK_RESOURCES = True
+BLOCKED_EXTENSIONS = [  # images, fonts and media
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico',
+    'woff', 'woff2', 'ttf', 'otf', 'eot',
+    'mp4', 'webm', 'm3u8', 'ts', 'mp3',
+]
+BLOCKED_DOMAINS = [  # third-party ad and tracking tags
+    'doubleclick.net', 'googlesyndication.com', 'googletagmanager.com',
+    'google-analytics.com', 'googletagservices.com', 'amazon-adsystem.com',
+    'adnxs.com', 'criteo.com', 'taboola.com', 'outbrain.com', 'facebook.net',
+    'scorecardresearch.com', 'moatads.com', 'pubmatic.com', 'rubiconproject.com',
+]
+CONTROL_EVERY = 25    # load every Nth page unblocked to estimate the bytes saved (0 = never)
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Page loads
+# ---------------------------
+
+# True once any ld+json script on the page declares a Recipe
+_HAS_JSONLD_RECIPE = """
+return Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+    .some(s => /"@type"\\s*:\\s*(\\[[^\\]]*)?"Recipe"/.test(s.textContent));
+"""
+
+def blocked_url_patterns():
+    patterns = [f'*.{ext}' for ext in BLOCKED_EXTENSIONS]
+    patterns += [f'*.{ext}?*' for ext in BLOCKED_EXTENSIONS]
+    for domain in BLOCKED_DOMAINS:
+        patterns += [f'*://{domain}/*', f'*://*.{domain}/*']
+    return patterns
+
+def set_blocking(driver, enabled):
+    driver.execute_cdp_cmd('Network.setBlockedURLs',
+                           {'urls': blocked_url_patterns() if enabled else []})
+
+def drain_network_log(driver):
+    """Return (bytes downloaded, requests blocked) since the last call."""
+    received = blocked = 0
+    try:
+        entries = driver.get_log('performance')
+    except WebDriverException:
+        return 0, 0
+    for entry in entries:
+        message = json_codec.loads(entry['message'])['message']
+        if message['method'] == 'Network.loadingFinished':
+            received += message['params'].get('encodedDataLength', 0)
+        elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            blocked += 1
+    return int(received), blocked
+
+# Every ld+json script text, collected in one WebDriver round-trip
+_JSONLD_TEXTS = """
+return Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+    .map(s => s.textContent);
+"""
+
+def jsonld_texts(driver):
+    """The page's ld+json script texts, without serializing the DOM via page_source."""
+    return driver.execute_script(_JSONLD_TEXTS) or []
+
+class RenderStats:
+    """Per-page render measurements, shared by every driver in the process."""
+
+    def __init__(self):
+        self.pages = []
+        self._loads = 0
+        self._lock = threading.Lock()
+
+    def next_is_control(self):
+        """True for the pages loaded without blocking as a baseline."""
+        with self._lock:
+            self._loads += 1
+            return bool(CONTROL_EVERY) and self._loads % CONTROL_EVERY == 0
+
+    def add(self, **page):
+        with self._lock:
+            self.pages.append(page)
+
+    def summary(self):
+        if not self.pages:
+            return "no pages rendered"
+        waits = sorted(p['wait'] for p in self.pages)
+        timeouts = sum(1 for p in self.pages if p['timed_out'])
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+        text = (f"{len(waits)} pages, render wait mean {statistics.mean(waits):.2f}s, "
+                f"median {statistics.median(waits):.2f}s, p95 {p95:.2f}s, "
+                f"max {waits[-1]:.2f}s, {timeouts} timed out")
+
+        blocked = [p for p in self.pages if p['blocking']]
+        control = [p for p in self.pages if not p['blocking']]
+        if blocked:
+            text += (f"; blocked {sum(p['blocked'] for p in blocked)} requests, "
+                     f"{statistics.mean(p['bytes'] for p in blocked) / 1e6:.2f} MB and "
+                     f"{statistics.mean(p['render'] for p in blocked):.2f}s per page")
+        if blocked and control:
+            saved = statistics.mean(p['bytes'] for p in control) - statistics.mean(p['bytes'] for p in blocked)
+            faster = statistics.mean(p['render'] for p in control) - statistics.mean(p['render'] for p in blocked)
+            text += (f" (vs {len(control)} unblocked control pages: ~{saved / 1e6:.2f} MB "
+                     f"and {faster:.2f}s saved per page, ~{saved * len(blocked) / 1e6:.1f} MB in total)")
+        return text
+
+render_stats = RenderStats()
+
+def load_page(driver, url, timeout=RENDER_TIMEOUT):
+    """
+    driver.get(url), then return as soon as a JSON-LD Recipe is in the DOM
+    or `timeout` seconds pass. Records the wait, total render time, bytes
+    downloaded and requests blocked; returns the seconds spent waiting.
+    """
+    blocking = BLOCK_RESOURCES and not render_stats.next_is_control()
+    if BLOCK_RESOURCES and not blocking:
+        set_blocking(driver, False)
+    try:
+        drain_network_log(driver)  # discard anything left from the previous page
+
+        start = time.monotonic()
+        driver.get(url)
+        loaded = time.monotonic()
+        timed_out = False
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=RENDER_POLL).until(
+                lambda d: d.execute_script(_HAS_JSONLD_RECIPE))
+        except TimeoutException:
+            timed_out = True
+        end = time.monotonic()
+
+        received, blocked = drain_network_log(driver)
+    finally:
+        # A control page must not leave the driver unblocked, even if it failed
+        if BLOCK_RESOURCES and not blocking:
+            set_blocking(driver, True)
+    render_stats.add(url=url, wait=end - loaded, render=end - start, timed_out=timed_out,
+                     blocking=blocking, bytes=received, blocked=blocked)
+    return end - loaded
+
+# ---------------------------
+# Headless Chrome pool
+# ---------------------------
+
+def chrome_options():
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    # Network events for the per-page byte and blocked-request counts
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+_driver_path_lock = threading.Lock()
+_driver_path = []
+
+def resolve_chromedriver(refresh=False):
+    """
+    chromedriver path without a network lookup when possible: $CHROMEDRIVER_PATH,
+    the path cached by the last webdriver_manager install, chromedriver on PATH,
+    and only then webdriver_manager (whose answer is cached for next time).
+    Returns None to let Selenium Manager find a driver.
+
+    refresh=True drops the cached path and asks webdriver_manager, then
+    Selenium Manager, again; used when the driver no longer matches Chrome.
+    """
+    with _driver_path_lock:
+        if _driver_path and not refresh:
+            return _driver_path[0]
+        path = None
+        if refresh:
+            try:
+                os.remove(CHROMEDRIVER_CACHE_FILE)
+            except OSError:
+                pass
+        else:
+            try:
+                with open(CHROMEDRIVER_CACHE_FILE, encoding='utf-8') as f:
+                    cached = f.read().strip()
+            except OSError:
+                cached = None
+            for candidate in (os.environ.get('CHROMEDRIVER_PATH'), cached, shutil.which('chromedriver')):
+                if candidate and os.access(candidate, os.X_OK):
+                    path = candidate
+                    break
+        if path is None and ChromeDriverManager is not None:
+            try:
+                path = ChromeDriverManager().install()
+                os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+                with open(CHROMEDRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+                    f.write(path)
+            except Exception as e:
+                logger.warning(f"webdriver_manager lookup failed, falling back to Selenium Manager: {e}")
+        _driver_path[:] = [path]
+        return path
+
+def browser_rss(driver):
+    """Resident memory in bytes of chromedriver and its Chrome processes, or None."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except (psutil.Error, AttributeError):
+        return None
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+def is_alive(driver):
+    """Health check: a crashed or hung browser fails this trivial round-trip."""
+    try:
+        driver.execute_script('return 1')
+        return True
+    except WebDriverException:
+        return False
+
+class DriverPool:
+    """
+    `size` headless Chrome instances, one per worker thread, fed from a
+    shared work queue. Each driver is health-checked before use and
+    restarted if it crashed, and recycled after `recycle_pages` pages or
+    once it uses more than `recycle_rss_mb`; page loads honour the per-host
+    rate limiter.
+    """
+
+    def __init__(self, size=POOL_SIZE, limiter=rate_limiter,
+                 recycle_pages=RECYCLE_PAGES, recycle_rss_mb=RECYCLE_RSS_MB):
+        self.size = size
+        self.limiter = limiter
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        self._drivers = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._workers = None  # one thread per driver, started on first use
+
+    def _start(self):
+        try:
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=chrome_options())
+        except SessionNotCreatedException as e:
+            # Typically Chrome updated itself past the cached chromedriver
+            logger.warning(f"Chrome session not created ({e.msg}), resolving chromedriver again")
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)),
+                                      options=chrome_options())
+        if BLOCK_RESOURCES:
+            driver.execute_cdp_cmd('Network.enable', {})
+            set_blocking(driver, True)
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _stop(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def driver(self):
+        """This worker's driver, (re)started if missing or unhealthy."""
+        driver = getattr(self._local, 'driver', None)
+        if driver is not None and not is_alive(driver):
+            logger.warning("Chrome driver failed its health check, restarting")
+            self._stop(driver)
+            driver = None
+        if driver is None:
+            driver = self._local.driver = self._start()
+            self._local.pages = 0
+        return driver
+
+    def _after_page(self, driver):
+        """Recycle the driver once it has served enough pages or grown too large."""
+        pages = self._local.pages = self._local.pages + 1
+        reason = None
+        if self.recycle_pages and pages >= self.recycle_pages:
+            reason = f"{pages} pages"
+        elif self.recycle_rss_mb and pages % RSS_CHECK_EVERY == 0:
+            rss = browser_rss(driver)
+            if rss is not None and rss > self.recycle_rss_mb * 1024 * 1024:
+                reason = f"{rss / 1024 / 1024:.0f} MB resident"
+        if reason:
+            logger.info(f"Recycling Chrome driver after {reason}")
+            self._stop(driver)
+            self._local.driver = None
+
+    def _run(self, func, url):
+        if self.limiter is not None:
+            self.limiter.wait(urlparse(url).netloc)
+        for attempt in range(2):
+            driver = None
+            try:
+                # Inside the try: a Chrome that fails to (re)start is this URL's error
+                driver = self.driver()
+                result = url, func(driver, url), None
+            except WebDriverException as e:
+                if not attempt and driver is not None and not is_alive(driver):
+                    logger.warning(f"Chrome crashed on {url}, restarting: {e}")
+                    self._stop(driver)
+                    self._local.driver = None
+                    continue
+                result = url, None, e
+            except Exception as e:
+                result = url, None, e
+            if driver is not None:
+                self._after_page(driver)
+            return result
+
+    def submit(self, func, url):
+        """Schedule func(driver, url); the Future resolves to (url, result, error)."""
+        with self._lock:
+            if self._workers is None:
+                self._workers = ThreadPoolExecutor(max_workers=self.size)
+        return self._workers.submit(self._run, func, url)
+
+    def map(self, func, urls):
+        """
+        Call func(driver, url) for every URL across the pool and yield
+        (url, result, error) in input order.
+        """
+        for future in [self.submit(func, url) for url in urls]:
+            yield future.result()
+
+    def close(self):
+        if self._workers is not None:
+            self._workers.shutdown(cancel_futures=True)
+            self._workers = None
+        for driver in list(self._drivers):
+            self._stop(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------
+# Static-first hybrid fetching
+# ---------------------------
+
+def _holds_recipe(block):
+    return bool(first_jsonld_recipe([block]))
+
+def fetch_static_recipe(url):
+    """
+    Plain HTTP fetch of `url`, read only up to the ld+json block holding its
+    Recipe; returns the Recipe or {}.
+    """
+    rate_limiter.wait(urlparse(url).netloc)
+    resp = response_cache.get(url, fetch=partial(fetch_partial, until_jsonld=_holds_recipe),
+                              allow_truncated=True)
+    resp.raise_for_status()
+    recipe = scan_jsonld_recipe(resp.content, resp.encoding)
+    if not recipe and getattr(resp, 'truncated', False):
+        # A cut-off body without the Recipe (e.g. cached by an older stop
+        # rule): read the whole page once, which replaces the cache entry
+        rate_limiter.wait(urlparse(url).netloc)
+        resp = response_cache.get(url)
+        resp.raise_for_status()
+        recipe = scan_jsonld_recipe(resp.content, resp.encoding)
+    return recipe
+
+class HybridFetcher:
+    """
+    Tries every URL with a plain HTTP fetch first and only renders the pages
+    without a JSON-LD Recipe (or whose fetch failed) on the browser pool.
+    """
+
+    def __init__(self, pool, browser_extract, workers=STATIC_WORKERS):
+        self.pool = pool
+        self.browser_extract = browser_extract
+        self.workers = workers
+        self.stats = {'static': 0, 'browser': 0}
+
+    def _static(self, url):
+        try:
+            return url, fetch_static_recipe(url)
+        except Exception as e:
+            logger.debug(f"static fetch failed for {url}: {e}")
+            return url, None
+
+    def _route(self, url):
+        """Static fetch; a miss goes to the browser pool at once, as a Future."""
+        url, recipe = self._static(url)
+        if recipe:
+            return (url, recipe, None), None
+        return None, self.pool.submit(self.browser_extract, url)
+
+    def map(self, urls):
+        """
+        Yield (url, result, error) like DriverPool.map, in input order. The
+        browser renders misses while the static fetches are still running.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as workers:
+            for future in [workers.submit(self._route, url) for url in urls]:
+                hit, rendering = future.result()
+                if hit is not None:
+                    self.stats['static'] += 1
+                    yield hit
+                else:
+                    self.stats['browser'] += 1
+                    yield rendering.result()
+
+    def summary(self):
+        total = self.stats['static'] + self.stats['browser']
+        share = 100 * self.stats['static'] / total if total else 0
+        return (f"{self.stats['static']} static, {self.stats['browser']} browser "
+                f"({share:.0f}% without a render)")
@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+CONCURRENCY_PER_HOST = 4
+STAGE_BUFFER = 32  # items queued between pipeline stages before the upstream stage blocks
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Per-host rate limiting
+# ---------------------------
+
+class TokenBucket:
+    """
+    Token bucket refilled at one token per `interval` seconds, holding at
+    most `burst` tokens. Callers reserve a token and are told how long to
+    wait for it, so concurrent callers are spaced exactly `interval` apart.
+    """
+
+    def __init__(self, interval, burst=1):
+        self.interval = interval
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        now = time.monotonic()
+        if self.interval > 0:
+            elapsed = now - self.updated
+            self.tokens = min(self.burst, self.tokens + elapsed / self.interval)
+        else:
+            self.tokens = self.burst
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens * self.interval)
+
+class HostRateLimiter:
+    """Per-host token buckets, shared by every scraper in the process."""
+
+    def __init__(self, default_interval=1):
+        self.default_interval = default_interval
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, interval, burst=1):
+        """Set the delay for `host`; the strictest delay wins if set twice."""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                self._buckets[host] = TokenBucket(interval, burst)
+            elif interval > bucket.interval:
+                bucket.interval = interval
+
+    def reserve(self, host):
+        """Take a slot for `host` and return the seconds to wait before using it."""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.default_interval)
+            return bucket.reserve()
+
+    def wait(self, host):
+        time.sleep(self.reserve(host))
+
+    async def wait_async(self, host):
+        await asyncio.sleep(self.reserve(host))
+
+rate_limiter = HostRateLimiter()
+
+# ---------------------------
+# Pipeline stage metrics
+# ---------------------------
+
+class StageStats:
+    """Items, errors and busy time of one pipeline stage, for sizing its workers."""
+
+    def __init__(self, name, workers=None):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.first = None
+        self.last = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        now = time.monotonic()
+        with self._lock:
+            self.items += 1
+            self.errors += error
+            self.busy += seconds
+            if self.first is None:
+                self.first = now - seconds
+            self.last = now
+
+    def summary(self):
+        if not self.items:
+            return f"{self.name}: idle"
+        wall = max(self.last - self.first, 1e-9)
+        line = (f"{self.name}: {self.items} items ({self.errors} errors), "
+                f"{self.items / wall:.1f}/s, {1000 * self.busy / self.items:.0f} ms each")
+        if self.workers:
+            line += f", {self.workers} workers {self.busy / (wall * self.workers):.0%} busy"
+        return line
+
+class PipelineStats:
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, workers=None):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageStats(name, workers)
+            elif workers:
+                stage.workers = workers
+            return stage
+
+    def summary(self):
+        return '; '.join(stage.summary() for stage in self.stages.values()) or 'no stages ran'
+
+pipeline_stats = PipelineStats()
+
+def _timed(func, args):
+    """Run func(*args) and return (result, seconds); module-level so it pickles."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+# ---------------------------
+# Async fetch engine
+# ---------------------------
+
+async def _aiter(iterable):
+    for item in iterable:
+        yield item
+
+async def fetch_all(fetch, urls, concurrency=CONCURRENCY_PER_HOST, limiter=rate_limiter,
+                    semaphores=None, buffer=0, stats=None):
+    """
+    Run the blocking `fetch(url)` on worker threads, at most `concurrency`
+    in flight per host, and yield (url, result, error) as each one completes.
+
+    `urls` may be a plain iterable or an async iterable; URLs are scheduled
+    as soon as they arrive. Each request start waits for a slot from
+    `limiter`, so the host's crawl delay holds however many are in flight.
+    Pass the same `semaphores` dict to several calls to share the per-host
+    concurrency budget between them.
+
+    With `buffer` > 0 at most that many finished fetches wait for the
+    consumer; beyond it fetchers block and hold their slots, so a slow
+    downstream stage slows the crawl instead of piling responses up in
+    memory. `stats` (a StageStats) records each fetch.
+    """
+    if not hasattr(urls, '__aiter__'):
+        urls = _aiter(urls)
+
+    if semaphores is None:
+        semaphores = {}
+    results = asyncio.Queue(buffer)
+    tasks = set()
+    done = object()
+
+    async def run(url):
+        host = urlparse(url).netloc
+        sem = semaphores.setdefault(host, asyncio.Semaphore(concurrency))
+        async with sem:
+            if limiter is not None:
+                await limiter.wait_async(host)
+            start = time.monotonic()
+            try:
+                result = await asyncio.to_thread(fetch, url)
+            except Exception as e:
+                if stats is not None:
+                    stats.record(time.monotonic() - start, error=True)
+                await results.put((url, None, e))
+            else:
+                if stats is not None:
+                    stats.record(time.monotonic() - start)
+                await results.put((url, result, None))
+
+    async def feed():
+        try:
+            async for url in urls:
+                task = asyncio.create_task(run(url))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await results.put(done)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (item := await results.get()) is not done:
+            yield item
+        await feeder  # re-raise errors from the URL source
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
+        # Let the cancellations finish before the caller closes the loop
+        await asyncio.gather(feeder, *tasks, return_exceptions=True)
+
+async def map_in_executor(executor, func, jobs, max_pending=STAGE_BUFFER, stats=None):
+    """
+    Run `func(*args)` on `executor` (e.g. a ProcessPoolExecutor) for each args
+    tuple from the async iterable `jobs`, yielding (args, result, error) as
+    each one completes.
+
+    At most `max_pending` jobs are submitted or waiting for the consumer;
+    past that the stage stops pulling from `jobs`, which pushes back on
+    whatever produces them. `stats` (a StageStats) records the time each
+    job spent running on its worker.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_pending)
+    results = asyncio.Queue()
+    tasks = set()
+    done = object()
+
+    async def run(args):
+        try:
+            result, seconds = await loop.run_in_executor(executor, _timed, func, args)
+        except Exception as e:
+            if stats is not None:
+                stats.record(0.0, error=True)
+            await results.put((args, None, e))
+        else:
+            if stats is not None:
+                stats.record(seconds)
+            await results.put((args, result, None))
+
+    async def feed():
+        try:
+            async for args in jobs:
+                await slots.acquire()
+                task = asyncio.create_task(run(args))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await results.put(done)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (item := await results.get()) is not done:
+            slots.release()  # the slot is held until the consumer takes the result
+            yield item
+        await feeder
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
+        # Let the cancellations finish before the caller closes the loop
+        await asyncio.gather(feeder, *tasks, return_exceptions=True)
+
+async def iterate_in_thread(iterable):
+    """Consume a blocking iterable on a worker thread, yielding its items here."""
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(items.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(items.put_nowait, (None, e))
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, (done, None))
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item, error = await items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+
+async def merge_async(*agens):
+    """Interleave several async generators, yielding items as they arrive."""
+    results = asyncio.Queue()
+    done = object()
+
+    async def drain(agen):
+        try:
+            async for item in agen:
+                await results.put((item, None))
+        except Exception as e:
+            await results.put((None, e))
+        finally:
+            await agen.aclose()
+            await results.put((done, None))
+
+    tasks = [asyncio.create_task(drain(agen)) for agen in agens]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item, error = await results.get()
+            if error is not None:
+                raise error
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def iterate_sync(agen):
+    """Drive an async generator from synchronous code, one item at a time."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from retries import get_with_retries
+from transport import shared_session
+from urls import canonicalize_url
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+CACHE_DIR = '.http_cache'
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_MAX_AGE = 0  # seconds a stored page is reused without revalidating it
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# On-disk response cache
+# ---------------------------
+
+class ResponseCache:
+    """
+    Stores 200 responses on disk under the SHA-256 of their canonical URL,
+    together with their ETag / Last-Modified validators. Later fetches send
+    a conditional GET and a 304 is answered from disk. The least recently
+    used entries are evicted once the bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0}
+        self._index = None  # key -> [body size, last used]
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return key, base + '.body', base + '.json'
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        if os.path.isdir(self.directory):
+            for sub in os.listdir(self.directory):
+                for name in os.listdir(os.path.join(self.directory, sub)):
+                    if name.endswith('.body'):
+                        st = os.stat(os.path.join(self.directory, sub, name))
+                        self._index[name[:-5]] = [st.st_size, st.st_mtime]
+        return self._index
+
+    def _read(self, url):
+        key, body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return key, None, None
+        return key, meta, body
+
+    def _write(self, key, body_path, meta_path, meta, body=None):
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        if body is not None:
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        with self._lock:
+            index = self._load_index()
+            index[key] = [os.path.getsize(body_path), time.time()]
+            self._evict(index)
+
+    def _evict(self, index):
+        total = sum(size for size, _ in index.values())
+        for key in sorted(index, key=lambda k: index[k][1]):
+            if total <= self.max_bytes:
+                break
+            base = os.path.join(self.directory, key[:2], key)
+            for path in (base + '.body', base + '.json'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= index.pop(key)[0]
+            self.stats['evicted'] += 1
+
+    def _touch(self, key, body_path):
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+        with self._lock:
+            entry = self._load_index().get(key)
+            if entry:
+                entry[1] = time.time()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _response(url, meta, body):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = 'OK'
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        resp.encoding = meta.get('encoding')
+        resp._content = body
+        resp.from_cache = True
+        resp.truncated = bool(meta.get('truncated'))
+        return resp
+
+    def get(self, url, session=None, fetch=get_with_retries, allow_truncated=False, **kwargs):
+        """
+        GET `url` through the cache; returns a requests.Response. `fetch` is
+        called as fetch(session, url, **kwargs) for the network request.
+
+        Bodies a partial fetch (streaming.fetch_partial) cut short are stored
+        flagged as truncated and served only to callers passing
+        allow_truncated=True; for anyone else they are a miss, fetched in full
+        without conditional headers.
+        """
+        session = session or shared_session()
+        key, meta, body = self._read(url)
+        _, body_path, meta_path = self._paths(url)
+        if meta is not None and meta.get('truncated') and not allow_truncated:
+            meta = body = None
+
+        if meta is not None and self.max_age and time.time() - meta['stored'] < self.max_age:
+            self._count('hits')
+            self._touch(key, body_path)
+            return self._response(url, meta, body)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        resp = fetch(session, url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and meta is not None:
+            self._count('revalidated')
+            meta['stored'] = time.time()
+            self._write(key, body_path, meta_path, meta)
+            return self._response(url, meta, body)
+
+        self._count('misses')
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if resp.status_code == 200 and (etag or last_modified or self.max_age):
+            meta = {
+                'url':           url,
+                'etag':          etag,
+                'last_modified': last_modified,
+                'headers':       {k: v for k, v in resp.headers.items()
+                                  if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')},
+                'encoding':      resp.encoding,
+                'truncated':     bool(getattr(resp, 'truncated', False)),
+                'stored':        time.time(),
+            }
+            self._write(key, body_path, meta_path, meta, resp.content)
+        return resp
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['hits']} hits, {s['revalidated']} revalidated (304), "
+                f"{s['misses']} misses, {s['evicted']} evicted")
+
+response_cache = ResponseCache()
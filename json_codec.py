@@ -0,0 +1,119 @@
+import importlib.util
+import json
+import logging
+import os
+import re
+
+try:
+    import orjson  # optional: `pip install orjson`
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec  # optional: `pip install msgspec`
+except ImportError:
+    msgspec = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+# JSON codecs, fastest first; 'json' is the stdlib and always available
+BACKENDS = ('orjson', 'msgspec', 'json')
+JSON_BACKEND = os.environ.get('RECIPE_JSON')  # None: fastest installed
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Codec backends
+# ---------------------------
+
+def _stdlib_dumps(obj):
+    # The format the JSONL writers have always produced; the reference the
+    # fast encoders must match byte for byte
+    return json.dumps(obj, ensure_ascii=False)
+
+def _spaced(raw):
+    # Compact JSON bytes in the stdlib's default ', ' / ': ' layout
+    return msgspec.json.format(raw, indent=0).decode('utf-8')
+
+# Where orjson spells a float differently from repr(): exponents without
+# padding (1e-7 for 1e-07), always signed, so found as 'e-' / 'e+' after a
+# digit, and 1e-6 <= |x| < 1e-4 written out (0.00001 for 1e-05), which repr
+# never does. (msgspec drops the '+', so its encoder isn't used.) A string
+# holding such a token just falls back to the stdlib.
+_EXPONENT = re.compile(rb'e[-+]\d')
+
+def _orjson_dumps(obj):
+    raw = orjson.dumps(obj)
+    for match in _EXPONENT.finditer(raw):
+        if raw[match.start() - 1:match.start()].isdigit():
+            raise ValueError('float exponent')
+    if b'0.0000' in raw:
+        raise ValueError('small float')
+    # NaN and Infinity are written as null; so are real Nones, which
+    # survive the round trip while NaN/Infinity (and tuples) don't
+    if b'null' in raw and orjson.loads(raw) != obj:
+        raise ValueError('non-finite float')
+    return _spaced(raw)
+
+_DECODERS = {'json': json.loads}
+_ENCODERS = {'json': _stdlib_dumps}
+if orjson is not None:
+    _DECODERS['orjson'] = orjson.loads
+if msgspec is not None:
+    _DECODERS['msgspec'] = msgspec.json.decode
+    if orjson is not None:
+        _ENCODERS['orjson'] = _orjson_dumps
+
+def available_backends():
+    """The BACKENDS whose library is installed."""
+    return [name for name in BACKENDS
+            if name == 'json' or importlib.util.find_spec(name) is not None]
+
+_default_backend = []
+
+def default_backend():
+    if not _default_backend:
+        installed = available_backends()
+        backend = JSON_BACKEND if JSON_BACKEND in installed else installed[0]
+        if JSON_BACKEND and JSON_BACKEND != backend:
+            logger.warning(f"JSON backend {JSON_BACKEND!r} is not installed, using {backend!r}")
+        _default_backend.append(backend)
+    return _default_backend[0]
+
+# ---------------------------
+# Encoding and decoding
+# ---------------------------
+
+def loads(raw, backend=None):
+    """
+    Decode a JSON document (str or bytes). Input the fast backend rejects
+    (NaN, integers past 64 bits, ...) is retried with the stdlib, so this
+    accepts exactly what json.loads does and raises ValueError like it.
+    """
+    backend = backend or default_backend()
+    if backend != 'json':
+        try:
+            return _DECODERS[backend](raw)
+        except Exception:
+            pass
+    return json.loads(raw)
+
+def dumps(obj, indent=None, backend=None):
+    """
+    Serialise `obj` exactly as json.dumps(obj, ensure_ascii=False) would.
+    orjson (reformatted by msgspec, so both must be installed) is used only
+    where its output is identical; floats with an exponent, NaN/Infinity,
+    anything it rejects and pretty-printed output (`indent`) come from the
+    stdlib, as does every other backend.
+    """
+    if indent is not None:
+        return json.dumps(obj, ensure_ascii=False, indent=indent)
+    backend = backend or default_backend()
+    if backend in _ENCODERS and backend != 'json':
+        try:
+            return _ENCODERS[backend](obj)
+        except Exception:
+            pass
+    return _stdlib_dumps(obj)
@@ -0,0 +1,135 @@
+import argparse
+import html
+import json
+import os
+import random
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+FIXTURES_DIR = 'fixtures'  # where benchmarks.py looks for saved pages
+SEED = 1                   # fixed, so every checkout generates the same pages
+
+# ---------------------------
+# Page templates
+# ---------------------------
+
+def ld_json(data, attrs='type="application/ld+json"', ensure_ascii=True):
+    # Escape '</' so a string value never closes the script early
+    text = json.dumps(data, ensure_ascii=ensure_ascii).replace('</', '<\\/')
+    return f'<script {attrs}>{text}</script>'
+
+def filler(rng, label):
+    """Ads and promo blocks that make up most of a real recipe page."""
+    return ''.join(f'<div class="ad-slot" id="ad{j}"><img src="/x{j}.jpg">'
+                   f'<p>Sponsored {html.escape(label)} &amp; more</p></div>'
+                   for j in range(rng.randint(50, 400)))
+
+def allrecipes_page(rng, recipe):
+    """Food.com/AllRecipes shape: two ld+json blocks and a feedback-list of reviews."""
+    name = str(recipe.get('name', ''))
+    reviews = ''.join(f'<div class="feedback reviews"><div class="feedback_title"><h2>Great {j}</h2></div>'
+                      f'<div class="feedback_meta">user{j}</div>'
+                      f'<div class="feedback_body-container">Loved it &amp; will make again</div></div>'
+                      for j in range(5))
+    return (f'<!DOCTYPE html><html><head><title>{html.escape(name)}</title>'
+            f'{ld_json({"@context": "https://schema.org", "@type": "WebSite", "name": "Food.com"})}'
+            f'{ld_json(recipe)}<script>var x = "<div>";</script></head>'
+            f'<body><h1>{html.escape(name)}</h1>'
+            f'<div class="feedback-list mm-recipes-feedback-list">{reviews}</div>'
+            f'{filler(rng, name)}</body></html>')
+
+def epicurious_page(rng, record):
+    """Epicurious shape: the Recipe inside an @graph and reviews__review blocks."""
+    title = record.get('title') or ''
+    recipe = {'@type': 'Recipe', 'name': title, 'recipeIngredient': record.get('ingredients', []),
+              'recipeInstructions': [{'@type': 'HowToStep', 'text': step}
+                                     for step in record.get('instructions', [])]}
+    graph = {'@context': 'https://schema.org',
+             '@graph': [{'@type': 'WebPage', '@id': record.get('url')},
+                        {'@type': 'Organization', 'name': 'Epicurious'}, recipe]}
+    reviews = ''.join(f'<div class="reviews__review"><a class="reviews__reviewer">cook{j}</a>'
+                      f'<p class="reviews__review-text">Made it {j} times</p></div>' for j in range(8))
+    return (f'<html><head><title>{html.escape(title)}</title>{ld_json(graph)}</head>'
+            f'<body><h1>{html.escape(title)}</h1>{filler(rng, title)}'
+            f'<section class="reviews">{reviews}</section></body></html>')
+
+def kitchenaid_page(rng, record):
+    """KitchenAid shape: an Ingredients h2 + list and STEP h3s each followed by a paragraph."""
+    ingredients = record.get('ingredients')
+    if not isinstance(ingredients, list):
+        ingredients = [f'{j + 1} cups flour' for j in range(rng.randint(3, 12))]
+    steps = record.get('steps')
+    if not isinstance(steps, list):
+        steps = [f'Step {j + 1}: Mix' for j in range(rng.randint(2, 8))]
+    items = ''.join(f'<li>{html.escape(str(i))}</li>' for i in ingredients)
+    body = ''.join(f'<h3>{html.escape(str(step).split(":")[0])}</h3><p>{html.escape(str(step))}</p>'
+                   for step in steps)
+    title = str(record.get('headline') or record.get('title') or '')
+    return (f'<html><head>{ld_json({"@type": "Article", "headline": title})}</head><body>'
+            f'<nav>{filler(rng, title)}</nav><article><h1>{html.escape(title)}</h1>'
+            f'<h2>Ingredients</h2><ul>{items}</ul><h2>Method</h2>{body}<h3>Tips</h3><p>tip</p>'
+            f'</article><footer>{filler(rng, title)}</footer></body></html>')
+
+def edge_case_pages():
+    """Markup the byte scanner must treat exactly like find_all(type='application/ld+json')."""
+    recipe = {'@type': 'Recipe', 'name': 'Edge case'}
+    variants = {
+        'data_type_decoy': ld_json({'@type': 'Recipe', 'name': 'decoy'}, 'data-type="application/ld+json"'),
+        'upper_case_tag': ld_json(recipe, 'TYPE="application/ld+json"').replace('script', 'SCRIPT'),
+        'mixed_case_value': ld_json({'@type': 'Recipe', 'name': 'not ld+json'}, 'type="Application/LD+JSON"'),
+        'single_quoted': ld_json(recipe, "type='application/ld+json'"),
+        'unquoted': ld_json(recipe, 'type=application/ld+json'),
+        'other_attrs': ld_json(recipe, 'id="schema" type="application/ld+json" nonce="x"'),
+        'suffixed_value': ld_json({'@type': 'Recipe', 'name': 'wrong type'}, 'type="application/ld+json-x"'),
+    }
+    pages = {f'edge_{name}': f'<html><head>{script}</head><body><p>{name}</p></body></html>'
+             for name, script in variants.items()}
+    # html.parser never sees a script inside a comment
+    pages['edge_commented_out'] = (
+        f'<html><head><!-- {ld_json({"@type": "Recipe", "name": "commented out"})} -->'
+        f'{ld_json(recipe)}</head><body><script>var s = "<!--";</script>'
+        f'{ld_json({"@type": "Recipe", "name": "after a script"})}</body></html>')
+    # Not UTF-8: the scanner has to honour the declared charset like BeautifulSoup
+    cp1252 = ld_json({'@type': 'Recipe', 'name': 'Crème brûlée'}, ensure_ascii=False)
+    pages['edge_windows_1252'] = (f'<html><head><meta charset="windows-1252">{cp1252}</head>'
+                                  f'<body><p>Crème brûlée</p></body></html>').encode('windows-1252')
+    return pages
+
+# ---------------------------
+# Generation
+# ---------------------------
+
+def load_records(path):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def make_fixtures(directory=FIXTURES_DIR, seed=SEED):
+    """Write synthetic pages built from the committed datasets; returns the page count."""
+    rng = random.Random(seed)
+    pages = {}
+    for i, recipe in enumerate(load_records('foodcom_recipes.json')[:60]):
+        pages[f'allrecipes_{i:03d}'] = allrecipes_page(rng, recipe)
+    for i, record in enumerate(load_records('Epicurious_dataset.jsonl')[:20]):
+        pages[f'epicurious_{i:03d}'] = epicurious_page(rng, record)
+    for i, record in enumerate(load_records('kitchenaid_recipes.json')[:12]):
+        pages[f'kitchenaid_{i:03d}'] = kitchenaid_page(rng, record)
+    pages.update(edge_case_pages())
+
+    os.makedirs(directory, exist_ok=True)
+    for name, page in pages.items():
+        with open(os.path.join(directory, name + '.html'), 'wb') as f:
+            f.write(page if isinstance(page, bytes) else page.encode('utf-8'))
+    return len(pages)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the benchmark fixture pages.")
+    parser.add_argument('directory', nargs='?', default=FIXTURES_DIR)
+    args = parser.parse_args()
+    print(f"Wrote {make_fixtures(args.directory)} pages to {args.directory}/")
+
+if __name__ == '__main__':
+    main()
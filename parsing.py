@@ -0,0 +1,160 @@
+import importlib.util
+import logging
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+try:
+    from bs4 import ElementFilter  # bs4 >= 4.13
+except ImportError:
+    ElementFilter = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+# BeautifulSoup tree builders, fastest first. lxml is a C parser and
+# html.parser is stdlib, so html5lib (browser-exact, but the slowest and it
+# ignores parse_only) is only used when RECIPE_PARSER asks for it.
+BACKENDS = ('lxml', 'html.parser', 'html5lib')
+PARSER_BACKEND = os.environ.get('RECIPE_PARSER')  # None: fastest installed
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Parser backends
+# ---------------------------
+
+def available_backends():
+    """The BACKENDS whose parser library is installed."""
+    return [name for name in BACKENDS
+            if name == 'html.parser' or importlib.util.find_spec(name) is not None]
+
+_default_backend = []
+
+def default_backend():
+    if not _default_backend:
+        installed = available_backends()
+        backend = PARSER_BACKEND if PARSER_BACKEND in installed else installed[0]
+        if PARSER_BACKEND and PARSER_BACKEND != backend:
+            logger.warning(f"Parser backend {PARSER_BACKEND!r} is not installed, using {backend!r}")
+        _default_backend.append(backend)
+    return _default_backend[0]
+
+def make_soup(markup, backend=None, **kwargs):
+    """
+    Parse `markup` (str or bytes) with the selected backend. Every backend
+    yields a BeautifulSoup tree, so find/select based extractors work unchanged.
+    """
+    return BeautifulSoup(markup, backend or default_backend(), **kwargs)
+
+# ---------------------------
+# Partial-tree parsing
+# ---------------------------
+
+# A region is (tag name, attribute, token): the element and its whole subtree
+# are kept when the attribute's whitespace-separated value contains the token
+JSONLD_REGION = ('script', 'type', 'application/ld+json')
+
+def _region_matcher(regions):
+    def wanted(name, attrs):
+        if not attrs:
+            return False
+        for tag, attr, token in regions:
+            value = attrs.get(attr) if name == tag else None
+            if value is None:
+                continue
+            if token in (value.split() if isinstance(value, str) else value):
+                return True
+        return False
+    return wanted
+
+def region_strainer(regions):
+    """parse_only filter keeping the ld+json scripts plus every given region."""
+    wanted = _region_matcher((JSONLD_REGION,) + tuple(regions))
+    if ElementFilter is None:
+        # Older bs4 calls a function `name` with the raw tag name and attributes
+        return SoupStrainer(wanted)
+
+    class RegionFilter(ElementFilter):
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return wanted(name, attrs)
+
+        def allow_string_creation(self, string):
+            return False
+
+    return RegionFilter()
+
+# ---------------------------
+# Section walking
+# ---------------------------
+
+def heading_sections(soup, ingredients_tag='h2', step_tag='h3'):
+    """
+    Ingredient lines and steps of a how-to article in one pass over its
+    headings. Ingredients are the <li> texts of the list right after the
+    first `ingredients_tag` heading mentioning "ingredients"; each
+    `step_tag` heading mentioning "step" becomes a step, joined with the
+    paragraph that follows it. Returns (ingredients, steps).
+    """
+    ingredients, steps = None, []
+    names = (ingredients_tag, step_tag)
+    # A bare walk with an isinstance test is several times faster than
+    # find_all(), which runs bs4's matcher machinery on every element
+    for heading in soup.descendants:
+        if not isinstance(heading, Tag) or heading.name not in names:
+            continue
+        text = heading.get_text(strip=True)
+        if heading.name == step_tag and 'step' in text.lower():
+            following = heading.find_next_sibling()
+            if following and following.name == 'p':
+                text += ' ' + following.get_text(strip=True)
+            steps.append(text)
+        elif ingredients is None and heading.name == ingredients_tag and 'ingredients' in text.lower():
+            following = heading.find_next_sibling()
+            ingredients = ([li.get_text(strip=True) for li in following.find_all('li')]
+                           if following and following.name in ('ul', 'ol') else [])
+    return ingredients or [], steps
+
+# ---------------------------
+# DOM-free JSON-LD scanning
+# ---------------------------
+
+# Comments and whole <script> elements, in document order: a script inside a
+# comment is never parsed, and a '<!--' inside a script doesn't open one
+_MARKUP = re.compile(rb'<!--.*?-->|<(?i:script)\b([^>]*)>(.*?)</(?i:script)\s*>', re.S)
+# Tag and attribute names are case-insensitive, the type value is not (as in
+# find_all(type='application/ld+json')); data-type= and friends don't count
+_JSONLD_TYPE = re.compile(
+    rb'(?<![\w-])(?i:type)\s*=\s*'
+    rb'(?:"application/ld\+json"|\'application/ld\+json\'|application/ld\+json(?![^\s/]))')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w-]+)', re.I)
+
+def _decode_block(block, raw, encoding):
+    # UTF-8 (or ASCII) blocks go to the JSON decoder as bytes; anything else
+    # is decoded with the response encoding, else the page's <meta charset>,
+    # else windows-1252, which is where BeautifulSoup's detection ends up too
+    try:
+        block.decode('utf-8')
+        return block
+    except UnicodeDecodeError:
+        pass
+    if encoding is None:
+        declared = _META_CHARSET.search(raw)
+        encoding = declared.group(1).decode('ascii') if declared else 'windows-1252'
+    try:
+        return block.decode(encoding, 'replace')
+    except LookupError:
+        return block.decode('windows-1252', 'replace')
+
+def iter_jsonld_blocks(raw, encoding=None):
+    """
+    Yield the body of every <script type="application/ld+json"> outside
+    comments in the raw page bytes, in document order, without building a
+    DOM. Blocks that aren't UTF-8 are decoded to str with `encoding` (e.g.
+    the response's), or the page's declared charset.
+    """
+    for match in _MARKUP.finditer(raw):
+        attrs = match.group(1)
+        if attrs is not None and _JSONLD_TYPE.search(attrs):
+            yield _decode_block(match.group(2), raw, encoding)
@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+
+from fetch_engine import rate_limiter
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+REQUEST_TIMEOUT = 10
+MAX_ATTEMPTS = 4
+BACKOFF_BASE, BACKOFF_MAX = 1, 60       # seconds, full-jitter exponential backoff
+RETRY_AFTER_MAX = 300                   # never honour a Retry-After longer than this
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Transient network errors; anything else (InvalidURL, MissingSchema,
+# TooManyRedirects, ...) fails the same way every time and is raised at once
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+BREAKER_THRESHOLD = 5                   # consecutive failures before a host is paused
+BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN = 30, 600
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Per-host circuit breaker
+# ---------------------------
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures per host. After `threshold` of them the host
+    is paused for `cooldown` seconds, doubling each time the first request
+    after a pause fails again, and requests to it wait instead of failing.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN,
+                 max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._failures = {}
+        self._cooldowns = {}
+        self._paused_until = {}
+        self._lock = threading.Lock()
+
+    def wait_time(self, host):
+        with self._lock:
+            return max(0.0, self._paused_until.get(host, 0) - time.monotonic())
+
+    def pause(self, host, seconds):
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._paused_until[host] = max(self._paused_until.get(host, 0), until)
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._cooldowns.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            if failures < self.threshold:
+                return
+            cooldown = self._cooldowns.get(host)
+            cooldown = self.cooldown if cooldown is None else min(self.max_cooldown, cooldown * 2)
+            self._cooldowns[host] = cooldown
+            # One more failure after the pause re-opens the breaker
+            self._failures[host] = self.threshold - 1
+            self._paused_until[host] = time.monotonic() + cooldown
+        logger.warning(f"[{host}] {failures} consecutive failures, pausing for {cooldown}s")
+
+circuit_breaker = CircuitBreaker()
+
+# ---------------------------
+# Retrying GET
+# ---------------------------
+
+def retry_after_seconds(resp):
+    """Parse a Retry-After header (seconds or HTTP date); None if absent."""
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(RETRY_AFTER_MAX, max(0.0, seconds))
+
+def backoff_seconds(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def get_with_retries(session, url, max_attempts=MAX_ATTEMPTS, breaker=circuit_breaker, **kwargs):
+    """
+    session.get() that retries transient network errors (RETRY_EXCEPTIONS)
+    and 429/5xx responses with jittered exponential backoff, honouring
+    Retry-After, and waits while the host's circuit breaker is open. Returns
+    the last response, or re-raises the last network error; other request
+    errors are raised on the first attempt without touching the breaker.
+    """
+    kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    host = urlparse(url).netloc
+    for attempt in range(max_attempts):
+        pause = breaker.wait_time(host)
+        if pause:
+            time.sleep(pause)
+        last_try = attempt == max_attempts - 1
+        try:
+            resp = session.get(url, **kwargs)
+        except RETRY_EXCEPTIONS as e:
+            breaker.record_failure(host)
+            if last_try:
+                raise
+            delay = backoff_seconds(attempt)
+            logger.debug(f"[{host}] {e} on {url}, retry {attempt + 1} in {delay:.1f}s")
+        else:
+            if resp.status_code not in RETRY_STATUSES:
+                breaker.record_success(host)
+                return resp
+            breaker.record_failure(host)
+            if last_try:
+                return resp
+            retry_after = retry_after_seconds(resp)
+            if retry_after is not None:
+                breaker.pause(host, retry_after)
+            delay = retry_after if retry_after is not None else backoff_seconds(attempt)
+            logger.debug(f"[{host}] HTTP {resp.status_code} on {url}, retry {attempt + 1} in {delay:.1f}s")
+            resp.close()
+        time.sleep(delay)
+        rate_limiter.wait(host)
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+import requests
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from fetch_engine import rate_limiter
+from retries import get_with_retries
+from transport import shared_session
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+ROBOTS_CACHE_DIR = '.robots_cache'
+ROBOTS_TTL = 24 * 60 * 60  # seconds before robots.txt is fetched again
+ROBOTS_ERROR_TTL = 10 * 60  # seconds a failed fetch (5xx, network error) is kept, in memory only
+ROBOTS_AGENT = 'RecipeScraper'
+DEFAULT_DELAY = 1  # seconds between requests to a host without a robots.txt Crawl-delay
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# robots.txt cache
+# ---------------------------
+
+class RobotsCache:
+    """
+    Parsed robots.txt per host, kept in memory and on disk for `ttl` seconds
+    so repeated runs and other processes skip the round-trip. Failed fetches
+    are only remembered in memory, for `error_ttl` seconds.
+    """
+
+    def __init__(self, directory=ROBOTS_CACHE_DIR, ttl=ROBOTS_TTL, agent=ROBOTS_AGENT,
+                 error_ttl=ROBOTS_ERROR_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.agent = agent
+        self._parsers = {}  # origin -> (expires, RobotFileParser)
+        self._host_locks = {}  # origin -> Lock held while that robots.txt is loaded
+        self._lock = threading.Lock()  # guards _host_locks only
+
+    def _path(self, origin):
+        return os.path.join(self.directory, urlparse(origin).netloc.replace(':', '_') + '.json')
+
+    def _download(self, origin):
+        robots_url = origin + '/robots.txt'
+        try:
+            resp = get_with_retries(shared_session(), robots_url, headers={'User-Agent': self.agent})
+            entry = {'status': resp.status_code, 'text': resp.text}
+        except requests.RequestException as e:
+            logger.debug(f"Could not fetch robots.txt at {robots_url}: {e}")
+            entry = {'status': None, 'text': ''}
+        entry['fetched'] = time.time()
+        if not self._failed(entry):
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(origin)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(path + '.tmp', path)
+        return entry
+
+    def _load(self, origin):
+        try:
+            with open(self._path(origin), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['fetched'] >= self.ttl:
+            return None
+        return entry
+
+    @staticmethod
+    def _failed(entry):
+        return entry['status'] is None or entry['status'] >= 500
+
+    @staticmethod
+    def _parse(entry):
+        # 401/403 and other 4xx as RobotFileParser.read(); on a server error
+        # read() leaves the parser unread, so can_fetch() refuses everything
+        rp = RobotFileParser()
+        status = entry['status']
+        if status in (401, 403) or (status is not None and status >= 500):
+            rp.disallow_all = True
+        elif status is None or 400 <= status < 500:
+            rp.allow_all = True
+        else:
+            rp.parse(entry['text'].splitlines())
+        return rp
+
+    def _cached(self, origin):
+        cached = self._parsers.get(origin)
+        if cached and cached[0] > time.time():
+            return cached[1]
+        return None
+
+    def get(self, url):
+        """
+        Return the RobotFileParser for the origin of `url`. A download only
+        blocks other callers asking for the same origin.
+        """
+        parsed = urlparse(url)
+        origin = f'{parsed.scheme}://{parsed.netloc}'
+        rp = self._cached(origin)
+        if rp is not None:
+            return rp
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+        with host_lock:
+            # Another thread may have loaded it while we waited
+            rp = self._cached(origin)
+            if rp is not None:
+                return rp
+            entry = self._load(origin) or self._download(origin)
+            rp = self._parse(entry)
+            ttl = self.error_ttl if self._failed(entry) else self.ttl
+            self._parsers[origin] = (entry['fetched'] + ttl, rp)
+            return rp
+
+    def crawl_delay(self, url):
+        return self.get(url).crawl_delay(self.agent)
+
+    def can_fetch(self, url):
+        return self.get(url).can_fetch(self.agent, url)
+
+robots_cache = RobotsCache()
+
+def configure_host(base_url, default_delay=DEFAULT_DELAY):
+    """
+    Space requests to the host of `base_url` by its robots.txt Crawl-delay,
+    or `default_delay` seconds without one; returns the delay.
+    """
+    delay = robots_cache.crawl_delay(base_url) or default_delay
+    rate_limiter.configure(urlparse(base_url).netloc, delay)
+    return delay
@@ -0,0 +1,329 @@
+import asyncio
+import requests
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from abc import ABC, abstractmethod
+
+import json_codec
+from fetch_engine import (
+    CONCURRENCY_PER_HOST, STAGE_BUFFER, fetch_all, iterate_in_thread, iterate_sync,
+    map_in_executor, merge_async, pipeline_stats,
+)
+from http_cache import response_cache
+from parsing import iter_jsonld_blocks, make_soup, region_strainer
+from robots_cache import configure_host, robots_cache
+from sitemaps import iter_sitemap_urls, load_last_crawl, save_last_crawl
+from transport import shared_session
+from urls import canonicalize_url
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; RecipeScraper/1.0; +https://yourdomain.com/bot)'
+}
+PAGES_PER_SITE = 10
+DELAY_MIN = 1  # seconds between requests to a host without a robots.txt Crawl-delay
+DISCOVERY = 'listing'  # 'listing' pages or 'sitemap' (only entries changed since the last crawl)
+PARSE_WORKERS = os.cpu_count() or 1  # parse processes; 0 parses on the fetch threads' default pool
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Utility functions
+# ---------------------------
+
+def get_crawl_delay(base_url):
+    """Return the robots.txt crawl-delay in seconds or None (cached, see robots_cache)."""
+    return robots_cache.crawl_delay(base_url)
+
+def fetch_page(session, url, timeout=10):
+    resp = response_cache.get(url, session=session, timeout=timeout)
+    resp.raise_for_status()
+    return resp
+
+def fetch_soup(session, url, timeout=10):
+    return make_soup(fetch_page(session, url, timeout).text)
+
+# Properties whose values never hold the page's Recipe but can be huge
+# (Food.com embeds every review)
+JSONLD_SKIP_KEYS = frozenset({'review', 'reviews', 'comment', 'publisher', 'author',
+                              'aggregateRating', 'nutrition', 'image', 'video'})
+
+def _is_recipe(node):
+    types = node.get('@type')
+    return types == 'Recipe' or (isinstance(types, list) and 'Recipe' in types)
+
+def iter_jsonld_recipes(data):
+    """
+    Yield Recipe nodes from decoded JSON-LD in document order (depth-first,
+    so a WebPage's mainEntity comes before a later @graph node), lazily.
+
+    Walks an explicit stack instead of recursing and never enters
+    JSONLD_SKIP_KEYS subtrees.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if _is_recipe(node):
+                yield node
+            stack.extend(v for k, v in reversed(node.items())
+                         if k not in JSONLD_SKIP_KEYS and isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(v for v in reversed(node) if isinstance(v, (dict, list)))
+
+def parse_executor(workers=PARSE_WORKERS):
+    """Process pool for the parse stage, or None for the event loop's thread pool."""
+    return ProcessPoolExecutor(workers) if workers else None
+
+def first_jsonld_recipe(blocks):
+    """Decode ld+json script texts (str or bytes) in order; return the first Recipe or {}."""
+    for raw in blocks:
+        try:
+            data = json_codec.loads(raw)
+        except ValueError:
+            continue
+        recipe = next(iter_jsonld_recipes(data), None)
+        if recipe is not None:
+            return recipe
+    return {}
+
+def extract_jsonld_recipe(soup):
+    return first_jsonld_recipe(script.string or script.get_text()
+                               for script in soup.find_all('script', type='application/ld+json'))
+
+def scan_jsonld_recipe(raw, encoding=None):
+    """
+    extract_jsonld_recipe() straight from the raw page bytes, without a DOM;
+    `encoding` is the response's, for pages that aren't UTF-8.
+    """
+    return first_jsonld_recipe(iter_jsonld_blocks(raw, encoding))
+
+def flatten_instructions(instr):
+    """
+    Given recipeInstructions (which can be str, dicts, lists, HowToSection, etc),
+    return a flat list of text steps.
+    """
+    steps = []
+    if isinstance(instr, str):
+        steps.append(instr)
+    elif isinstance(instr, dict):
+        # If it's a HowToSection, it may have an "itemListElement"
+        if 'itemListElement' in instr:
+            steps += flatten_instructions(instr['itemListElement'])
+        elif 'text' in instr:
+            steps.append(instr['text'])
+    elif isinstance(instr, list):
+        for item in instr:
+            steps += flatten_instructions(item)
+    return steps
+
+# ---------------------------
+# Site abstraction
+# ---------------------------
+
+class SiteScraper(ABC):
+    sitemap_urls = ()  # defaults to the Sitemap: lines of robots.txt
+    # Byte strings one of which must occur in a page before extract_comments
+    # is worth a DOM; None always parses recipe pages
+    comment_markers = None
+    # (tag, attribute, token) regions extract_comments reads; when set only
+    # those subtrees (plus ld+json scripts) are parsed, see parsing.region_strainer
+    comment_regions = None
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = shared_session()
+        self.session.headers.update(HEADERS)
+        self.host = urlparse(self.base_url).netloc
+        self.delay = configure_host(self.base_url, DELAY_MIN)
+        self.discovery = DISCOVERY
+        self._strainer = None
+
+    def __getstate__(self):
+        # Scrapers are pickled into parse worker processes, which need no
+        # session and rebuild the strainer on first use
+        state = self.__dict__.copy()
+        state['session'] = None
+        state['_strainer'] = None
+        return state
+
+    @abstractmethod
+    def listing_urls(self):
+        """Return the listing pages that link to recipes."""
+        pass
+
+    @abstractmethod
+    def extract_recipe_urls(self, soup):
+        """Yield canonical recipe URLs found on a listing page."""
+        pass
+
+    def is_recipe_url(self, url):
+        """Tell recipe pages apart from other sitemap entries."""
+        return True
+
+    @abstractmethod
+    def extract_comments(self, soup):
+        """Return a list of {author, text} from the soup."""
+        pass
+
+    def comments_from_page(self, content, encoding=None):
+        """Build a DOM for extract_comments only if the page can contain comments."""
+        if self.comment_markers is not None and not any(m in content for m in self.comment_markers):
+            return []
+        if self.comment_regions is None:
+            return self.extract_comments(make_soup(content, from_encoding=encoding))
+        if self._strainer is None:
+            self._strainer = region_strainer(self.comment_regions)
+        return self.extract_comments(make_soup(content, from_encoding=encoding,
+                                               parse_only=self._strainer))
+
+    def parse_page(self, url, content, encoding=None):
+        """
+        Build the record for a fetched recipe page, or None without a JSON-LD
+        recipe. Runs in a parse worker process, so only picklable state is used.
+        """
+        data = scan_jsonld_recipe(content, encoding)
+        if not data:
+            return None
+        return {
+            'source':       self.base_url,
+            'url':          url,
+            'title':        data.get('name'),
+            'ingredients':  data.get('recipeIngredient', []),
+            'instructions': flatten_instructions(data.get('recipeInstructions', [])),
+            'comments':     self.comments_from_page(content, encoding)
+        }
+
+    def scrape(self, concurrency=CONCURRENCY_PER_HOST, parse_workers=PARSE_WORKERS):
+        """Yield one record per recipe; sync wrapper around scrape_async()."""
+        return scrape_all([self], concurrency, parse_workers)
+
+    async def listing_recipe_urls(self, concurrency=CONCURRENCY_PER_HOST, semaphores=None):
+        """
+        Fetch the listing pages one at a time, yielding each page's links.
+
+        The next listing page is only requested once the consumer has taken
+        every link of the previous one, so with shared `semaphores` it queues
+        behind those recipe fetches: the first record arrives after one
+        listing round-trip, not after the whole listing.
+        """
+        fetch = lambda url: fetch_soup(self.session, url)
+        for listing in self.listing_urls():
+            async for page, soup, error in fetch_all(fetch, [listing], concurrency,
+                                                     semaphores=semaphores):
+                if error is not None:
+                    logger.warning(f"[{self.base_url}] error fetching listing {page}: {error}")
+                    continue
+                for url in self.extract_recipe_urls(soup):
+                    yield url
+
+    def sitemap_recipe_urls(self, failed=None):
+        """Yield recipe URLs from the site's sitemaps changed since the last crawl."""
+        roots = (self.sitemap_urls or robots_cache.get(self.base_url).site_maps()
+                 or [self.base_url + '/sitemap.xml'])
+        since = load_last_crawl(self.base_url)
+        if since:
+            logger.info(f"   only sitemap entries modified since {since.isoformat()}")
+        for url in iter_sitemap_urls(self.session, roots, since, failed):
+            if self.is_recipe_url(url):
+                yield canonicalize_url(url)
+
+    async def collect_recipe_urls(self, concurrency=CONCURRENCY_PER_HOST, semaphores=None,
+                                  failed=None):
+        """
+        Yield each new recipe URL as soon as it is discovered, skipping URLs
+        robots.txt disallows. Unreadable sitemaps are appended to `failed`.
+        The robots.txt check runs on a thread, since a host's first lookup
+        downloads it and would otherwise stall every scraper on the loop.
+        """
+        logger.info(f"→ collecting URLs from {self.base_url}…")
+        if self.discovery == 'sitemap':
+            found = iterate_in_thread(self.sitemap_recipe_urls(failed))
+        else:
+            found = self.listing_recipe_urls(concurrency, semaphores)
+        seen = set()
+        skipped = 0
+        async for url in found:
+            if url in seen:
+                continue
+            seen.add(url)
+            if not await asyncio.to_thread(robots_cache.can_fetch, url):
+                skipped += 1
+                continue
+            yield url
+        logger.info(f"   found {len(seen)} recipes on {self.base_url}")
+        if skipped:
+            logger.info(f"   skipped {skipped} URLs disallowed by robots.txt")
+
+    async def fetch_pages(self, concurrency=CONCURRENCY_PER_HOST, failed=None):
+        """
+        Fetch stage: yield (url, body bytes, encoding) for each recipe page;
+        URLs (pages or sitemaps) that could not be fetched go to `failed`.
+        """
+        if failed is None:
+            failed = []
+        # Listing and recipe fetches share one per-host concurrency budget
+        semaphores = {}
+        urls = self.collect_recipe_urls(concurrency, semaphores, failed)
+        fetch = lambda url: fetch_page(self.session, url)
+        async for url, resp, error in fetch_all(fetch, urls, concurrency, semaphores=semaphores,
+                                                buffer=STAGE_BUFFER,
+                                                stats=pipeline_stats.stage('fetch')):
+            if isinstance(error, requests.RequestException):
+                logger.warning(f"[{self.base_url}] network error fetching {url}: {error}")
+                failed.append(url)
+                continue
+            if error is not None:
+                logger.error(f"[{self.base_url}] unexpected error on {url}: {error}")
+                failed.append(url)
+                continue
+            yield url, resp.content, resp.encoding
+
+    async def scrape_async(self, concurrency=CONCURRENCY_PER_HOST, executor=None, workers=None):
+        """
+        Fetch pages on threads and parse them with parse_page() on `executor`
+        (see parse_executor; None uses the default thread pool). The stages
+        are joined by bounded queues, so fetching waits when parsing lags.
+
+        The last-crawl time sitemap discovery filters on only advances after a
+        sitemap crawl in which every page was fetched and parsed.
+        """
+        started = datetime.now(timezone.utc)
+        stats = pipeline_stats.stage('parse', workers)
+        failed = []
+        async for (url, _, _), rec, error in map_in_executor(
+                executor, self.parse_page, self.fetch_pages(concurrency, failed), STAGE_BUFFER, stats):
+            if error is not None:
+                logger.error(f"[{self.base_url}] unexpected error on {url}: {error}")
+                failed.append(url)
+                continue
+            if rec is None:
+                logger.debug(f"[{self.base_url}] no JSON-LD recipe on {url}")
+                continue
+            yield rec
+        if self.discovery != 'sitemap':
+            return
+        if failed:
+            logger.warning(f"[{self.base_url}] {len(failed)} URLs failed; keeping the last crawl "
+                           f"time so the next sitemap crawl retries them")
+        else:
+            save_last_crawl(self.base_url, started)
+
+def scrape_all(scrapers, concurrency=CONCURRENCY_PER_HOST, parse_workers=PARSE_WORKERS):
+    """
+    Run several scrapers at once; each host keeps its own rate limit and all
+    of them share one pool of `parse_workers` parse processes.
+    """
+    executor = parse_executor(parse_workers)
+    try:
+        yield from iterate_sync(merge_async(*(s.scrape_async(concurrency, executor, parse_workers)
+                                              for s in scrapers)))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,130 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from xml.etree.ElementTree import iterparse
+
+from fetch_engine import rate_limiter
+from retries import get_with_retries
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+CRAWL_STATE_FILE = '.crawl_state.json'
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Last crawl bookkeeping
+# ---------------------------
+
+_state_lock = threading.Lock()
+
+def load_last_crawl(base_url, path=CRAWL_STATE_FILE):
+    """Return the datetime of the last finished crawl of `base_url`, or None."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            value = json.load(f).get(base_url)
+    except (OSError, ValueError):
+        return None
+    return parse_lastmod(value) if value else None
+
+def save_last_crawl(base_url, when, path=CRAWL_STATE_FILE):
+    with _state_lock:
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state[base_url] = when.isoformat()
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+# ---------------------------
+# Sitemap parsing
+# ---------------------------
+
+def parse_lastmod(text):
+    """Parse a W3C datetime (as used by <lastmod>) into an aware datetime."""
+    try:
+        dt = datetime.fromisoformat(text.strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def _sitemap_tag(tag):
+    """Local name of a sitemaps.org (or un-namespaced) element, None for other namespaces."""
+    if tag.startswith(SITEMAP_NS):
+        return tag[len(SITEMAP_NS):]
+    return None if tag.startswith('{') else tag
+
+def iter_sitemap(session, sitemap_url, timeout=10):
+    """
+    Stream one sitemap or sitemap index and yield (kind, loc, lastmod) with
+    kind 'sitemap' or 'url'. Elements are cleared as they are read, so memory
+    stays flat however large the file is.
+    """
+    rate_limiter.wait(urlparse(sitemap_url).netloc)
+    with get_with_retries(session, sitemap_url, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        stream = resp.raw
+        if sitemap_url.endswith('.gz') and 'xml' not in resp.headers.get('Content-Type', ''):
+            stream = gzip.GzipFile(fileobj=stream)
+
+        # Only <loc>/<lastmod> directly under <url>/<sitemap> in the sitemaps.org
+        # namespace (or none) count; <image:loc> and friends are skipped
+        root = None
+        path = []
+        loc = lastmod = None
+        for event, elem in iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                path.append(_sitemap_tag(elem.tag))
+                if root is None:
+                    root = elem
+                continue
+            tag = path.pop()
+            if len(path) == 2 and path[1] in ('url', 'sitemap'):
+                if tag == 'loc':
+                    loc = (elem.text or '').strip()
+                elif tag == 'lastmod':
+                    lastmod = parse_lastmod(elem.text or '')
+            elif len(path) == 1 and tag in ('url', 'sitemap'):
+                if loc:
+                    yield tag, loc, lastmod
+                loc = lastmod = None
+                root.clear()
+
+def iter_sitemap_urls(session, sitemap_urls, since=None, failed=None):
+    """
+    Walk sitemaps (following indexes) and yield page URLs whose <lastmod> is
+    at or after `since`. Entries without a <lastmod> are always yielded.
+    Sitemaps that cannot be read are logged and appended to `failed`.
+    """
+    pending = list(sitemap_urls)
+    visited = set()
+    while pending:
+        sitemap_url = pending.pop()
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        try:
+            for kind, loc, lastmod in iter_sitemap(session, sitemap_url):
+                if since is not None and lastmod is not None and lastmod < since:
+                    continue
+                if kind == 'sitemap':
+                    pending.append(loc)
+                else:
+                    yield loc
+        except Exception as e:
+            logger.warning(f"Could not read sitemap {sitemap_url}: {e}")
+            if failed is not None:
+                failed.append(sitemap_url)
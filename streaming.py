@@ -0,0 +1,91 @@
+import logging
+import re
+
+from retries import get_with_retries
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+MAX_BODY_BYTES = 4 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+_JSONLD_OPEN = re.compile(rb'<script[^>]+application/ld\+json[^>]*>', re.I)
+_SCRIPT_CLOSE = re.compile(rb'</script\s*>', re.I)
+
+# ---------------------------
+# Early-terminating reader
+# ---------------------------
+
+class _StopScanner:
+    """Incrementally tracks complete ld+json blocks and stop markers in a growing buffer."""
+
+    def __init__(self, jsonld_blocks, markers, until_jsonld=None):
+        self.jsonld_needed = jsonld_blocks
+        self.until_jsonld = until_jsonld
+        self.jsonld_seen = 0
+        self.jsonld_done = until_jsonld is None and jsonld_blocks <= 0
+        self.pos = 0
+        self.markers = [m.lower() for m in markers]
+        self.overlap = max((len(m) for m in self.markers), default=0)
+
+    def feed(self, buf, new_from):
+        while not self.jsonld_done:
+            opening = _JSONLD_OPEN.search(buf, self.pos)
+            if not opening:
+                # Keep a tail so a tag split across chunks is found next time
+                self.pos = max(self.pos, len(buf) - 256)
+                break
+            closing = _SCRIPT_CLOSE.search(buf, opening.end())
+            if not closing:
+                self.pos = opening.start()
+                break
+            self.jsonld_seen += 1
+            self.pos = closing.end()
+            if self.until_jsonld is None:
+                self.jsonld_done = self.jsonld_seen >= self.jsonld_needed
+            else:
+                self.jsonld_done = self.until_jsonld(bytes(buf[opening.end():closing.start()]))
+        if self.markers:
+            window = buf[max(0, new_from - self.overlap):].lower()
+            self.markers = [m for m in self.markers if m not in window]
+        return self.jsonld_done and not self.markers
+
+def fetch_partial(session, url, jsonld_blocks=1, markers=(), until_jsonld=None,
+                  max_bytes=MAX_BODY_BYTES, chunk_size=CHUNK_SIZE, **kwargs):
+    """
+    GET `url` but stop reading once `jsonld_blocks` complete ld+json scripts
+    and every byte string in `markers` have been received, or after
+    `max_bytes`. With `until_jsonld`, a callable taking each complete ld+json
+    block's bytes, the JSON-LD condition is instead the first block it
+    accepts, e.g. the one holding the Recipe. Returns a requests.Response
+    holding only the bytes read; `resp.truncated` tells whether the body was
+    cut short. Closing a response early drops its connection, so use this
+    where the page tail is large. Drop-in for get_with_retries, e.g. as ResponseCache.get(fetch=...).
+    """
+    resp = get_with_retries(session, url, stream=True, **kwargs)
+    scanner = _StopScanner(jsonld_blocks, markers, until_jsonld)
+    buf = bytearray()
+    truncated = False
+    try:
+        if resp.status_code == 200:
+            for chunk in resp.iter_content(chunk_size):
+                start = len(buf)
+                buf += chunk
+                if scanner.feed(buf, start):
+                    truncated = True
+                    break
+                if len(buf) >= max_bytes:
+                    logger.debug(f"{url}: body exceeds {max_bytes} bytes, truncating")
+                    del buf[max_bytes:]
+                    truncated = True
+                    break
+        else:
+            buf += resp.content
+    finally:
+        resp.close()
+    resp._content = bytes(buf)
+    resp.truncated = truncated
+    return resp
@@ -0,0 +1,226 @@
+import io
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx  # optional: HTTP/2 needs `pip install httpx[http2]`
+except ImportError:
+    httpx = None
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+POOL_HOSTS = 16       # hosts with a cached connection pool
+POOL_MAXSIZE = 16     # keep-alive connections kept per host
+USE_HTTP2 = False     # multiplex https requests over HTTP/2 when httpx[http2] is installed
+DNS_CACHE_TTL = 300   # seconds a resolved address is reused
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Connection metrics
+# ---------------------------
+
+class TransportStats:
+    def __init__(self):
+        self.counts = {'requests': 0, 'connections': 0, 'tls_handshakes': 0,
+                       'dns_lookups': 0, 'dns_hits': 0}
+        self._lock = threading.Lock()
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def summary(self):
+        c = self.counts
+        reused = max(0, c['requests'] - c['connections'])
+        return (f"{c['requests']} requests over {c['connections']} connections "
+                f"({reused} reused, {c['tls_handshakes']} TLS handshakes), "
+                f"DNS {c['dns_lookups']} lookups / {c['dns_hits']} cached")
+
+stats = TransportStats()
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        stats.add('connections')
+        super().connect()
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        stats.add('connections')
+        stats.add('tls_handshakes')
+        super().connect()
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+# ---------------------------
+# DNS cache
+# ---------------------------
+
+_real_getaddrinfo = socket.getaddrinfo
+_dns_cache = {}
+_dns_lock = threading.Lock()
+
+def _cached_getaddrinfo(*args, **kwargs):
+    key = (args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    with _dns_lock:
+        hit = _dns_cache.get(key)
+    if hit and hit[0] > now:
+        stats.add('dns_hits')
+        return hit[1]
+    stats.add('dns_lookups')
+    result = _real_getaddrinfo(*args, **kwargs)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_CACHE_TTL, result)
+    return result
+
+def enable_dns_cache():
+    """Route every getaddrinfo() in the process through the TTL cache."""
+    socket.getaddrinfo = _cached_getaddrinfo
+
+# ---------------------------
+# Adapters
+# ---------------------------
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host urllib3 pools report new connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        stats.add('requests')
+        return super().send(request, **kwargs)
+
+class HTTP2Adapter(BaseAdapter):
+    """Sends requests through an httpx HTTP/2 client, returning requests.Response objects."""
+
+    # Connection-specific headers are not allowed in HTTP/2
+    HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+    def __init__(self):
+        super().__init__()
+        if httpx is None:
+            raise ImportError("HTTP/2 needs `pip install httpx[http2]`")
+        self._clients = {}  # (verify, cert, proxy) -> httpx.Client
+        self._lock = threading.Lock()
+        self._client(True, None, None)  # the default client; raises here if h2 is missing
+
+    @staticmethod
+    def _ssl_context(verify, cert):
+        # requests' verify (bool or CA bundle path) and cert (path or (cert, key))
+        if verify is False:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        elif isinstance(verify, str) and os.path.isdir(verify):
+            context = ssl.create_default_context(capath=verify)
+        elif isinstance(verify, str):
+            context = ssl.create_default_context(cafile=verify)
+        else:
+            context = ssl.create_default_context()
+        if isinstance(cert, tuple):
+            context.load_cert_chain(*cert)
+        elif cert:
+            context.load_cert_chain(cert)
+        return context
+
+    def _client(self, verify, cert, proxy):
+        """One HTTP/2 client per TLS/proxy setting, since httpx fixes them per client."""
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                # trust_env=False: requests has already merged the environment proxies
+                client = self._clients[key] = httpx.Client(
+                    http2=True, verify=self._ssl_context(verify, cert), proxy=proxy,
+                    trust_env=False, limits=httpx.Limits(max_connections=POOL_HOSTS * POOL_MAXSIZE,
+                                                         max_keepalive_connections=POOL_MAXSIZE))
+            return client
+
+    @staticmethod
+    def _trace(event, info):
+        # httpcore connection events, e.g. 'connection.connect_tcp.complete'
+        if event.endswith('.connect_tcp.complete'):
+            stats.add('connections')
+        elif event.endswith('.start_tls.complete'):
+            stats.add('tls_handshakes')
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        stats.add('requests')
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._client(verify, cert, select_proxy(request.url, proxies or {}))
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in self.HOP_HEADERS}
+        try:
+            r = client.request(request.method, request.url, headers=headers, content=request.body,
+                               timeout=timeout, extensions={'trace': self._trace})
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp.reason = r.reason_phrase
+        resp.headers = CaseInsensitiveDict(r.headers)
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.url = str(r.url)
+        resp.request = request
+        resp.connection = self
+        resp._content = r.content
+        resp.raw = io.BytesIO(r.content)  # already decoded by httpx
+        return resp
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+# ---------------------------
+# Shared session
+# ---------------------------
+
+_session = None
+_session_lock = threading.Lock()
+
+def shared_session():
+    """The process-wide session every scraper fetches through."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            enable_dns_cache()
+            session = requests.Session()
+            adapter = PooledAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if USE_HTTP2:
+                try:
+                    session.mount('https://', HTTP2Adapter())
+                except (AttributeError, ImportError) as e:
+                    logger.warning(f"HTTP/2 unavailable, using HTTP/1.1 keep-alive: {e}")
+            _session = session
+        return _session
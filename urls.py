@@ -0,0 +1,46 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlunsplit, urlencode
+
+# ---------------------------
+# Configuration
+# ---------------------------
+
+CANONICAL_CACHE_SIZE = 65536  # URLs memoised by canonicalize_url
+TRACKING_PARAMS = re.compile(r'utm_|fbclid')  # query keys starting with these are dropped
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+# ---------------------------
+# URL helpers
+# ---------------------------
+
+def _canonical_netloc(scheme, netloc):
+    # Lower-case the host (never the user info) and drop the scheme's default port
+    userinfo, at, hostport = netloc.rpartition('@')
+    hostport = hostport.lower()
+    port = DEFAULT_PORTS.get(scheme)
+    if port and hostport.endswith(port):
+        hostport = hostport[:-len(port)]
+    return userinfo + at + hostport
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonicalize_url(raw_url):
+    """
+    Return the normalized form of a URL: tracking query params (utm_*, fbclid)
+    and the fragment removed, scheme and host lower-cased, default ports and
+    trailing slashes dropped. Results are memoised, see canonicalize_url.cache_info().
+    """
+    scheme, netloc, path, query, _ = urlsplit(raw_url)
+    scheme = scheme.lower()
+    netloc = _canonical_netloc(scheme, netloc)
+    path = path.rstrip('/') or ('/' if netloc else '')
+    if query:
+        query = urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+                           if not TRACKING_PARAMS.match(k)])
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+def canonicalize_many(urls):
+    """canonicalize_url for a batch of URLs, as a list; repeats are normalized once."""
+    batch = {}
+    return [batch[url] if url in batch else batch.setdefault(url, canonicalize_url(url))
+            for url in urls]